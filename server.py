@@ -1,24 +1,87 @@
+import asyncio
+import atexit
+import base64
+import binascii
 import imaplib
-import smtplib
 import email
+import email.parser
+import email.policy
 import email.utils
+import functools
 import os
+import quopri
+import re
+import threading
 import time
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager, suppress
+from typing import TYPE_CHECKING, NamedTuple
 from email.header import decode_header
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 
 from dotenv import load_dotenv
 from mcp.server import FastMCP
 
-load_dotenv()
-
-IMAP_HOST = os.environ["IMAP_HOST"]
-IMAP_PORT = int(os.environ.get("IMAP_PORT", "993"))
-SMTP_HOST = os.environ["SMTP_HOST"]
-SMTP_PORT = int(os.environ.get("SMTP_PORT", "587"))
-EMAIL_USER = os.environ["EMAIL_USER"]
-EMAIL_PASSWORD = os.environ["EMAIL_PASSWORD"]
+if TYPE_CHECKING:
+    import smtplib
+
+
+class _Config(NamedTuple):
+    imap_host: str
+    imap_port: int
+    smtp_host: str
+    smtp_port: int
+    email_user: str
+    email_password: str
+    # Set when the server files submitted mail into Sent itself (e.g. a Sieve rule)
+    save_to_sent_server_side: bool
+
+
+@functools.cache
+def _cfg() -> _Config:
+    """Read credentials on first use, so the server can start without them."""
+    load_dotenv()
+    return _Config(
+        imap_host=os.environ["IMAP_HOST"],
+        imap_port=int(os.environ.get("IMAP_PORT", "993")),
+        smtp_host=os.environ["SMTP_HOST"],
+        smtp_port=int(os.environ.get("SMTP_PORT", "587")),
+        email_user=os.environ["EMAIL_USER"],
+        email_password=os.environ["EMAIL_PASSWORD"],
+        save_to_sent_server_side=os.environ.get("SAVE_TO_SENT_SERVER_SIDE", "false").lower() == "true",
+    )
+
+
+# Seconds a pooled IMAP connection may sit idle before it is NOOP'd.
+IMAP_KEEPALIVE = 25
+# Socket timeout in seconds, so a half-open connection fails instead of hanging
+IMAP_TIMEOUT = 30
+# Same for the cached SMTP session
+SMTP_TIMEOUT = 30
+
+# Newest INBOX summaries kept in memory by the IDLE watcher
+INBOX_CACHE_SIZE = 200
+# Seconds per IDLE before re-issuing it. RFC 2177 allows up to 29 minutes,
+# but a NAT or firewall can drop the session silently long before that
+IDLE_DURATION = 5 * 60
+# Upper bound on the IDLE watcher's reconnect back-off, in seconds
+IDLE_RETRY_MAX = 15 * 60
+
+# Common Trash names, tried when the server does not flag one with SPECIAL-USE
+TRASH_NAMES = ["Trash", "INBOX.Trash", "Deleted Items", "Deleted"]
+
+_FETCH_UID_RE = re.compile(rb"UID (\d+)")
+_FLAGS_RE = re.compile(rb"FLAGS \(([^)]*)\)")
+_APPENDUID_RE = re.compile(rb"APPENDUID \d+ (\d+)")
+_IMAP_TOKEN_RE = re.compile(rb'\s*(?:(\()|(\))|"((?:[^"\\]|\\.)*)"|\{(\d+)\}\r\n|([^\s()"]+))')
+_IMAP_UTF7_RE = re.compile(rb"&([^-]*)-")
+_MAILBOX_8BIT_RE = re.compile(r"([^ -~]+)")
+_SECTION_RE = re.compile(r"\d+(?:\.\d+)*")
+_BASE64_JUNK_RE = re.compile(rb"[^A-Za-z0-9+/]")
+
+# Header-only parser; stops at the blank line before the body. With
+# policy.default, header values come back already RFC 2047-decoded
+_HEADER_PARSER = email.parser.BytesHeaderParser(policy=email.policy.default)
 
 mcp = FastMCP(
     "Email",
@@ -44,112 +107,766 @@ HTML formatting rules:
 
 
 def _decode_header_value(value: str) -> str:
-    if not value:
-        return ""
-    parts = decode_header(value)
-    decoded = []
-    for part, charset in parts:
-        if isinstance(part, bytes):
-            decoded.append(part.decode(charset or "utf-8", errors="replace"))
-        else:
-            decoded.append(part)
-    return " ".join(decoded)
-
-
-def _get_body(msg: email.message.Message) -> str:
-    if msg.is_multipart():
-        for part in msg.walk():
-            content_type = part.get_content_type()
-            disposition = str(part.get("Content-Disposition", ""))
-            if content_type == "text/plain" and "attachment" not in disposition:
-                payload = part.get_payload(decode=True)
-                if payload:
-                    charset = part.get_content_charset() or "utf-8"
-                    return payload.decode(charset, errors="replace")
-        # Fallback to text/html if no plain text found
-        for part in msg.walk():
-            content_type = part.get_content_type()
-            disposition = str(part.get("Content-Disposition", ""))
-            if content_type == "text/html" and "attachment" not in disposition:
-                payload = part.get_payload(decode=True)
-                if payload:
-                    charset = part.get_content_charset() or "utf-8"
-                    return payload.decode(charset, errors="replace")
+    if "=?" not in value:
+        # No RFC 2047 encoded-words, nothing to decode
+        return value
+    return _decode_encoded_words(value)
+
+
+@functools.lru_cache(maxsize=2048)
+def _decode_encoded_words(value: str) -> str:
+    # decode_header() keeps the whitespace that belongs to the text and drops
+    # the whitespace between adjacent encoded-words (RFC 2047 6.2), so the
+    # chunks are joined as-is
+    return "".join(_decode_chunk(part, charset) for part, charset in decode_header(value))
+
+
+def _decode_chunk(part: bytes | str, charset: str | None) -> str:
+    if isinstance(part, str):
+        return part
+    try:
+        return part.decode(charset or "utf-8", errors="replace")
+    except LookupError:
+        # Unknown or pseudo charsets such as "unknown-8bit"
+        return part.decode("utf-8", errors="replace")
+
+
+def _bodystructure_params(items: list | None) -> dict[str, str]:
+    """Turn a BODYSTRUCTURE parameter list into a dict, decoding RFC 2231 values."""
+    if not isinstance(items, list):
+        return {}
+    pairs = [
+        (key.decode(errors="replace").lower(), (value or b"").decode(errors="replace"))
+        for key, value in zip(items[::2], items[1::2])
+    ]
+    params = {}
+    for name, value in email.utils.decode_params([("", "")] + pairs)[1:]:
+        if isinstance(value, tuple):
+            # RFC 2231 (charset, language, text); text is still quoted
+            value = (value[0], value[1], email.utils.unquote(value[2]))
+        params[name] = email.utils.collapse_rfc2231_value(value)
+    return params
+
+
+def _walk_bodystructure(node: list, section: str = "") -> Iterator[dict]:
+    """Yield every leaf part of a parsed BODYSTRUCTURE with its section number."""
+    if not node:
+        return
+    if node and isinstance(node[0], list):
+        # multipart: child parts come first, then the subtype and extensions
+        for i, child in enumerate(node, start=1):
+            if not isinstance(child, list):
+                break
+            yield from _walk_bodystructure(child, f"{section}.{i}" if section else str(i))
+        return
+
+    section = section or "1"
+    maintype = node[0].decode().lower()
+    subtype = node[1].decode().lower()
+    # Extension data follows the type-specific fields
+    if maintype == "text":
+        disposition_index = 9
+    elif (maintype, subtype) == ("message", "rfc822"):
+        disposition_index = 11
     else:
-        payload = msg.get_payload(decode=True)
-        if payload:
-            charset = msg.get_content_charset() or "utf-8"
-            return payload.decode(charset, errors="replace")
-    return ""
+        disposition_index = 8
+    disposition = node[disposition_index] if len(node) > disposition_index else None
+    if not isinstance(disposition, list):
+        disposition = [None, None]
+    yield {
+        "section": section,
+        "content_type": f"{maintype}/{subtype}",
+        "params": _bodystructure_params(node[2]),
+        "encoding": (node[5] or b"7BIT").decode().lower(),
+        "octets": int(node[6] or 0),
+        "disposition": (disposition[0] or b"").decode().lower() or None,
+        "disposition_params": _bodystructure_params(disposition[1]),
+    }
+    if (maintype, subtype) == ("message", "rfc822") and isinstance(node[8], list):
+        inner = node[8]
+        yield from _walk_bodystructure(inner, section if isinstance(inner[0], list) else f"{section}.1")
+
+
+def _decoded_size(part: dict) -> int:
+    if part["encoding"] == "base64":
+        # 76 base64 characters plus CRLF per line carry 57 bytes
+        return part["octets"] * 57 // 78
+    return part["octets"]
+
 
+def _part_filename(part: dict) -> str:
+    filename = part["disposition_params"].get("filename") or part["params"].get("name")
+    return _decode_header_value(filename) if filename else ""
 
-def _get_attachments(msg: email.message.Message) -> list[dict]:
+
+def _get_attachments(bodystructure: list) -> list[dict]:
     attachments = []
-    if msg.is_multipart():
-        for part in msg.walk():
-            disposition = str(part.get("Content-Disposition", ""))
-            if "attachment" in disposition:
-                filename = part.get_filename()
-                if filename:
-                    filename = _decode_header_value(filename)
-                    attachments.append({
-                        "filename": filename,
-                        "content_type": part.get_content_type(),
-                        "size": len(part.get_payload(decode=True) or b""),
-                    })
+    for part in _walk_bodystructure(bodystructure):
+        if part["disposition"] != "attachment":
+            continue
+        filename = _part_filename(part)
+        if filename:
+            attachments.append({
+                "part": part["section"],
+                "filename": filename,
+                "content_type": part["content_type"],
+                "size": _decoded_size(part),
+            })
     return attachments
 
 
-def _imap_connect() -> imaplib.IMAP4_SSL:
-    conn = imaplib.IMAP4_SSL(IMAP_HOST, IMAP_PORT)
-    conn.login(EMAIL_USER, EMAIL_PASSWORD)
-    return conn
+def _get_body_part(bodystructure: list) -> dict | None:
+    """Pick the part holding the body text: first text/plain, else first text/html."""
+    if not bodystructure:
+        return None
+    parts = _walk_bodystructure(bodystructure)
+    if not isinstance(bodystructure[0], list):
+        # Single-part message: the body is the message itself
+        return next(parts)
+
+    html = None
+    for part in parts:
+        if part["disposition"] == "attachment" or not part["octets"]:
+            continue
+        if part["content_type"] == "text/plain":
+            return part
+        if part["content_type"] == "text/html" and html is None:
+            html = part
+    return html
+
+
+def _fetch_section(conn: imaplib.IMAP4, uid: str, part: dict) -> bytes:
+    """FETCH a single MIME part and undo its Content-Transfer-Encoding."""
+    section = part["section"]
+    status, msg_data = conn.uid("fetch", uid.encode(), f"(BODY.PEEK[{section}])")
+    data = _fetch_fields(msg_data, uid.encode()).get(f"BODY[{section}]".encode()) if status == "OK" else None
+    if not data:
+        return b""
+    if part["encoding"] == "base64":
+        try:
+            return base64.b64decode(data)
+        except binascii.Error:
+            # Truncated or badly padded: keep what decodes, like
+            # get_payload(decode=True) does, rather than failing the call
+            data = _BASE64_JUNK_RE.sub(b"", data)
+            if len(data) % 4 == 1:
+                # A lone trailing character does not carry a whole byte
+                data = data[:-1]
+            return base64.b64decode(data + b"=" * (-len(data) % 4))
+    if part["encoding"] == "quoted-printable":
+        return quopri.decodestring(data)
+    return data
+
+
+def _decode_text(data: bytes, part: dict) -> str:
+    try:
+        text = data.decode(part["params"].get("charset") or "utf-8", errors="replace")
+    except LookupError:
+        text = data.decode("utf-8", errors="replace")
+    # IMAP sends CRLF line endings; match what the email package returns
+    return text.replace("\r\n", "\n")
+
+
+def _decode_mailbox(name: bytes) -> str:
+    """Decode an RFC 3501 modified UTF-7 mailbox name."""
+    parts = []
+    pos = 0
+    for match in _IMAP_UTF7_RE.finditer(name):
+        parts.append(name[pos:match.start()].decode(errors="replace"))
+        chunk = match.group(1)
+        if chunk:
+            chunk = chunk.replace(b",", b"/") + b"=" * (-len(chunk) % 4)
+            parts.append(base64.b64decode(chunk).decode("utf-16-be", errors="replace"))
+        else:
+            parts.append("&")
+        pos = match.end()
+    parts.append(name[pos:].decode(errors="replace"))
+    return "".join(parts)
+
+
+def _encode_mailbox(name: str) -> str:
+    """Encode a mailbox name as a quoted, modified UTF-7 IMAP string."""
+    parts = []
+    # Odd items of the split are runs of non-printable-ASCII characters
+    for i, run in enumerate(_MAILBOX_8BIT_RE.split(name)):
+        if i % 2:
+            chunk = base64.b64encode(run.encode("utf-16-be")).rstrip(b"=")
+            parts.append("&" + chunk.replace(b"/", b",").decode() + "-")
+        else:
+            parts.append(run.replace("&", "&-"))
+    encoded = "".join(parts).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{encoded}"'
+
+
+class _PooledIMAP(imaplib.IMAP4_SSL):
+    """IMAP4_SSL connection that stays logged in across tool calls."""
+
+    def __init__(self, host: str, port: int, timeout: float | None = None) -> None:
+        super().__init__(host, port, timeout=timeout)
+        self.selected: tuple[str, bool] | None = None
+        self.last_used = time.monotonic()
+
+    def login(self, user: str, password: str):
+        status, data = super().login(user, password)
+        # Extensions such as MOVE and UIDPLUS are often only advertised after login
+        cap_status, cap_data = self.capability()
+        if cap_status == "OK" and cap_data[-1]:
+            self.capabilities = tuple(cap_data[-1].decode().upper().split())
+        return status, data
+
+    def select(self, mailbox: str = "INBOX", readonly: bool = False):
+        self.selected = None
+        status, data = super().select(_encode_mailbox(mailbox), readonly)
+        if status == "OK":
+            self.selected = (mailbox, readonly)
+        return status, data
+
+    def clear_unsolicited(self) -> None:
+        """Drop untagged responses left behind by earlier commands.
+
+        imaplib only resets OK/NO/BAD before each command; without a fresh
+        SELECT, FETCH/EXISTS/EXPUNGE/RECENT entries sent unprompted (e.g. for
+        another client's flag change) would pile up and get handed back with
+        the next command's results.
+        """
+        for typ in ("FETCH", "EXISTS", "EXPUNGE", "RECENT"):
+            self.untagged_responses.pop(typ, None)
+
+    def select_cached(self, mailbox: str, readonly: bool = False) -> str:
+        """SELECT a folder unless it is already the selected one."""
+        if self.selected == (mailbox, readonly):
+            return "OK"
+        status, _ = self.select(mailbox, readonly)
+        return status
+
+
+_imap_lock = threading.RLock()
+_imap_pool: dict[tuple[str, str], _PooledIMAP] = {}
+_imap_keepalive: threading.Thread | None = None
+# Resolved Trash mailbox; "" once LIST found no \Trash-flagged mailbox
+_trash_folder: str | None = None
+
+
+def _imap_drop(key: tuple[str, str]) -> None:
+    conn = _imap_pool.pop(key, None)
+    if conn is not None:
+        try:
+            conn.shutdown()
+        except OSError:
+            pass
+
+
+def _imap_keepalive_loop() -> None:
+    while True:
+        time.sleep(IMAP_KEEPALIVE)
+        with _imap_lock:
+            for key, conn in list(_imap_pool.items()):
+                if time.monotonic() - conn.last_used < IMAP_KEEPALIVE:
+                    continue
+                try:
+                    conn.noop()
+                    conn.clear_unsolicited()
+                    conn.last_used = time.monotonic()
+                except (imaplib.IMAP4.abort, OSError):
+                    _imap_drop(key)
+
+
+@contextmanager
+def _imap_connection() -> Iterator[_PooledIMAP]:
+    """Borrow the pooled IMAP connection, logging in on first use.
+
+    A connection that fails with `abort` or a socket error is dropped from the
+    pool, so the next call reconnects.
+    """
+    global _imap_keepalive
+    cfg = _cfg()
+    key = (cfg.imap_host, cfg.email_user)
+    with _imap_lock:
+        conn = _imap_pool.get(key)
+        if conn is not None and time.monotonic() - conn.last_used > 2 * IMAP_KEEPALIVE:
+            # The keepalive thread should have touched it; probe before reuse
+            try:
+                conn.noop()
+            except (imaplib.IMAP4.abort, OSError):
+                _imap_drop(key)
+                conn = None
+        if conn is None:
+            conn = _PooledIMAP(cfg.imap_host, cfg.imap_port, timeout=IMAP_TIMEOUT)
+            try:
+                conn.login(cfg.email_user, cfg.email_password)
+            except BaseException:
+                conn.shutdown()
+                raise
+            _imap_pool[key] = conn
+            if _imap_keepalive is None:
+                _imap_keepalive = threading.Thread(
+                    target=_imap_keepalive_loop, name="imap-keepalive", daemon=True
+                )
+                _imap_keepalive.start()
+        conn.clear_unsolicited()
+        try:
+            yield conn
+        except (imaplib.IMAP4.abort, OSError):
+            _imap_drop(key)
+            raise
+        finally:
+            conn.last_used = time.monotonic()
+
+
+@atexit.register
+def _imap_close() -> None:
+    with _imap_lock:
+        while _imap_pool:
+            _, conn = _imap_pool.popitem()
+            try:
+                conn.logout()
+            except (imaplib.IMAP4.error, OSError):
+                pass
+
+
+_smtp_lock = threading.Lock()
+_smtp_client: "smtplib.SMTP | None" = None
+
+
+@contextmanager
+def _smtp_connection() -> Iterator["smtplib.SMTP"]:
+    """Borrow the cached SMTP session (already STARTTLS'd and logged in).
+
+    The session is probed with NOOP before reuse and re-established if the
+    server has dropped it.
+    """
+    import smtplib
+
+    global _smtp_client
+    with _smtp_lock:
+        smtp = _smtp_client
+        if smtp is not None:
+            try:
+                code, _ = smtp.noop()
+            except (smtplib.SMTPServerDisconnected, OSError):
+                code = 0
+            if code != 250:
+                smtp.close()
+                smtp = _smtp_client = None
+        if smtp is None:
+            cfg = _cfg()
+            smtp = smtplib.SMTP(cfg.smtp_host, cfg.smtp_port, timeout=SMTP_TIMEOUT)
+            try:
+                smtp.starttls()
+                smtp.login(cfg.email_user, cfg.email_password)
+            except BaseException:
+                smtp.close()
+                raise
+            _smtp_client = smtp
+        try:
+            yield smtp
+        except smtplib.SMTPServerDisconnected:
+            smtp.close()
+            _smtp_client = None
+            raise
+        except smtplib.SMTPException:
+            # SMTPException subclasses OSError; a refused recipient or sender
+            # leaves the session usable
+            raise
+        except OSError:
+            smtp.close()
+            _smtp_client = None
+            raise
+
+
+@atexit.register
+def _smtp_close() -> None:
+    global _smtp_client
+    with _smtp_lock:
+        if _smtp_client is not None:
+            try:
+                _smtp_client.quit()
+            except OSError:  # includes SMTPException
+                _smtp_client.close()
+            _smtp_client = None
+
+
+def _save_to_sent(conn: imaplib.IMAP4, msg_bytes: bytes) -> bytes | None:
+    """APPEND a message to Sent; return its UID if the server reports it (UIDPLUS)."""
+    date_time = imaplib.Time2Internaldate(time.time())
+    status, data = conn.append("Sent", "(\\Seen)", date_time, msg_bytes)
+    match = _APPENDUID_RE.search(data[0] or b"") if status == "OK" and data else None
+    return match.group(1) if match else None
+
+
+def _expunge_uid(conn: imaplib.IMAP4, uid: bytes) -> None:
+    """Flag a message \\Deleted and expunge it.
+
+    With UIDPLUS only that message is expunged, leaving other messages
+    flagged \\Deleted by another client alone.
+    """
+    conn.uid("store", uid, "+FLAGS", "(\\Deleted)")
+    if "UIDPLUS" in conn.capabilities:
+        conn.uid("expunge", uid)
+    else:
+        conn.expunge()
+
+
+_sent_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="save-to-sent")
+
+
+def _append_to_sent(msg_bytes: bytes) -> bytes | None:
+    with _imap_connection() as conn:
+        return _save_to_sent(conn, msg_bytes)
 
 
-def _save_to_sent(msg_bytes: bytes) -> None:
-    conn = _imap_connect()
+def _discard_sent_copy(saved: Future) -> None:
     try:
-        date_time = imaplib.Time2Internaldate(time.time())
-        conn.append("Sent", "(\\Seen)", date_time, msg_bytes)
-    finally:
-        conn.logout()
+        uid = saved.result()
+    except Exception:
+        return
+    if uid is None:
+        return
+    with suppress(imaplib.IMAP4.error, OSError), _imap_connection() as conn:
+        if conn.select_cached("Sent") == "OK":
+            _expunge_uid(conn, uid)
+
+
+def _send_message(recipients: list[str], msg_bytes: bytes) -> None:
+    """Send a message over SMTP and file a copy in Sent.
+
+    With UIDPLUS the IMAP APPEND runs alongside sendmail() so the two
+    round-trips overlap, and if the send fails the Sent copy is removed again
+    by its UID. Without UIDPLUS that copy could not be found again, so the
+    APPEND waits until the send has succeeded.
+    """
+    cfg = _cfg()
+    if cfg.save_to_sent_server_side:
+        with _smtp_connection() as smtp:
+            smtp.sendmail(cfg.email_user, recipients, msg_bytes)
+        return
+
+    with _imap_connection() as conn:
+        uidplus = "UIDPLUS" in conn.capabilities
+    if not uidplus:
+        with _smtp_connection() as smtp:
+            smtp.sendmail(cfg.email_user, recipients, msg_bytes)
+        _append_to_sent(msg_bytes)
+        return
+
+    saved = _sent_executor.submit(_append_to_sent, msg_bytes)
+    try:
+        with _smtp_connection() as smtp:
+            smtp.sendmail(cfg.email_user, recipients, msg_bytes)
+    except Exception:
+        _discard_sent_copy(saved)
+        raise
+    saved.result()
+
+
+def _fetch_items(msg_data: list) -> list[tuple[bytes, bytes]]:
+    """Group a multi-message FETCH response into (metadata, literal) pairs.
+
+    imaplib returns each message as a `(prefix, literal)` tuple followed by a
+    bytes item closing the parenthesised list. Data items such as FLAGS may
+    land on either side of the literal, so the closing part is folded back
+    into the metadata.
+    """
+    items: list[list[bytes]] = []
+    for part in msg_data:
+        if isinstance(part, tuple):
+            items.append([part[0], part[1]])
+        elif part and items and not part[:1].isdigit():
+            items[-1][0] += part
+    return [(meta, literal) for meta, literal in items]
+
+
+def _parse_imap_list(data: bytes) -> list:
+    """Parse IMAP response data into nested lists of bytes.
+
+    Quoted strings and literals become bytes, NIL becomes None and
+    parenthesised lists become Python lists.
+    """
+    stack: list[list] = [[]]
+    pos = 0
+    while match := _IMAP_TOKEN_RE.match(data, pos):
+        pos = match.end()
+        opening, closing, quoted, literal, atom = match.groups()
+        if opening:
+            stack.append([])
+        elif closing:
+            if len(stack) > 1:
+                done = stack.pop()
+                stack[-1].append(done)
+        elif quoted is not None:
+            stack[-1].append(re.sub(rb"\\(.)", rb"\1", quoted))
+        elif literal is not None:
+            size = int(literal)
+            stack[-1].append(data[pos:pos + size])
+            pos += size
+        else:
+            stack[-1].append(None if atom.upper() == b"NIL" else atom)
+    return stack[0]
+
+
+def _fetch_fields(msg_data: list, uid: bytes) -> dict[bytes, object]:
+    """Parse a single-message UID FETCH response into {data item: value}.
+
+    The imaplib tuples are stitched back into the wire format first, so
+    literals nested inside BODYSTRUCTURE are handled like any other string.
+    Servers may send FETCH responses for other messages at any time, so the
+    one whose UID matches is picked; an empty dict means it was not there.
+    """
+    chunks = []
+    for part in msg_data:
+        if isinstance(part, tuple):
+            chunks += [part[0], b"\r\n", part[1]]
+        elif part:
+            chunks.append(part)
+    for items in _parse_imap_list(b"".join(chunks)):
+        if not isinstance(items, list):
+            continue
+        fields = {key.upper(): value for key, value in zip(items[::2], items[1::2]) if isinstance(key, bytes)}
+        if fields.get(b"UID") == uid:
+            return fields
+    return {}
+
+
+def _list_mailboxes(conn: imaplib.IMAP4) -> list[tuple[frozenset[bytes], str]] | None:
+    """LIST all mailboxes as (lower-cased flags, decoded name) pairs."""
+    status, folders = conn.list()
+    if status != "OK":
+        return None
+    mailboxes = []
+    for entry in folders:
+        if isinstance(entry, tuple):
+            # Mailbox name sent as a literal
+            entry = entry[0] + b"\r\n" + entry[1]
+        # Format: (flags) delimiter name -- the name may be quoted or a literal
+        fields = _parse_imap_list(entry)
+        if len(fields) == 3 and isinstance(fields[0], list) and isinstance(fields[2], bytes):
+            flags = frozenset(flag.lower() for flag in fields[0] if flag)
+            mailboxes.append((flags, _decode_mailbox(fields[2])))
+    return mailboxes
+
+
+def _new_message(body: str, html: str = ""):
+    """Build an outgoing message: multipart/alternative when HTML is given."""
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+
+    if html:
+        msg = MIMEMultipart("alternative")
+        msg.attach(MIMEText(body, "plain", "utf-8"))
+        msg.attach(MIMEText(html, "html", "utf-8"))
+    else:
+        msg = MIMEText(body, "plain", "utf-8")
+    msg["From"] = _cfg().email_user
+    return msg
+
+
+def _in_thread(fn):
+    """Run a blocking tool body in a worker thread.
+
+    imaplib/smtplib block on every round-trip; offloading keeps the stdio
+    event loop responsive and lets independent tool calls (e.g. an SMTP send
+    and an IMAP listing) overlap instead of queueing behind each other.
+    """
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        return await asyncio.to_thread(fn, *args, **kwargs)
+    return wrapper
+
+
+def _retry_on_reconnect(fn):
+    """Run a read-only IMAP tool body again if the pooled connection died.
+
+    _imap_connection drops a connection that fails with `abort` or a socket
+    error (including a timeout on a half-open socket), so the second attempt
+    runs on a fresh one. Only for tools that are safe to repeat.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        try:
+            return fn(*args, **kwargs)
+        except (imaplib.IMAP4.abort, OSError):
+            return fn(*args, **kwargs)
+    return wrapper
 
 
 def _format_email_summary(uid: bytes, msg: email.message.Message) -> dict:
+    # The UID stays bytes through FETCH parsing and is decoded only here
     return {
         "uid": uid.decode(),
-        "from": _decode_header_value(msg.get("From", "")),
-        "to": _decode_header_value(msg.get("To", "")),
-        "subject": _decode_header_value(msg.get("Subject", "")),
-        "date": msg.get("Date", ""),
+        "from": str(msg.get("From", "")),
+        "to": str(msg.get("To", "")),
+        "subject": str(msg.get("Subject", "")),
+        "date": str(msg.get("Date", "")),
     }
 
 
+def _fetch_summaries(conn: imaplib.IMAP4, lo: int, hi: int) -> list[dict] | None:
+    """FETCH summaries for sequence numbers lo..hi in one command, newest first."""
+    status, msg_data = conn.fetch(f"{lo}:{hi}", "(UID BODY.PEEK[HEADER] FLAGS)")
+    if status != "OK":
+        return None
+
+    results = []
+    for meta, raw in reversed(_fetch_items(msg_data)):
+        match = _FETCH_UID_RE.search(meta)
+        if not match:
+            continue
+        msg = _HEADER_PARSER.parsebytes(raw)
+        summary = _format_email_summary(match.group(1), msg)
+
+        flags_match = _FLAGS_RE.search(meta)
+        flags = frozenset(flags_match.group(1).split()) if flags_match else frozenset()
+        summary["seen"] = b"\\Seen" in flags
+
+        results.append(summary)
+    return results
+
+
+class _InboxCache:
+    """Newest INBOX summaries, kept current over a dedicated IDLE connection.
+
+    New mail (EXISTS) is fetched incrementally; expunges and flag changes
+    made by other clients trigger a full resync. Until the first sync
+    completes, if the server lacks IDLE, or if no IDLE cycle has finished
+    recently (the connection may be dead), `get` returns None and
+    email_list goes to the server as usual.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.summaries: list[dict] = []
+        self.exists = 0
+        self.ready = False
+        # When the server last answered the watcher (time.monotonic())
+        self.checked = 0.0
+        self.thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="imap-idle", daemon=True)
+                self.thread.start()
+
+    def get(self, count: int) -> list[dict] | None:
+        with self.lock:
+            if not self.ready or time.monotonic() - self.checked > IDLE_DURATION + 60:
+                return None
+            if count > len(self.summaries) and len(self.summaries) < self.exists:
+                return None
+            return [dict(summary) for summary in self.summaries[:max(count, 0)]]
+
+    def discard(self, uid: str) -> None:
+        with self.lock:
+            kept = [summary for summary in self.summaries if summary["uid"] != uid]
+            self.exists -= len(self.summaries) - len(kept)
+            self.summaries = kept
+
+    def _run(self) -> None:
+        delay = IMAP_KEEPALIVE
+        while True:
+            conn = None
+            try:
+                cfg = _cfg()
+                # idle() applies its own timeout while waiting for updates; this
+                # one bounds DONE and every other command on a dead session
+                conn = _PooledIMAP(cfg.imap_host, cfg.imap_port, timeout=IMAP_TIMEOUT)
+                try:
+                    conn.login(cfg.email_user, cfg.email_password)
+                except imaplib.IMAP4.abort:
+                    raise
+                except imaplib.IMAP4.error:
+                    # Rejected credentials won't start working on their own,
+                    # and repeated failed logins get the client IP banned
+                    conn.shutdown()
+                    return
+                if "IDLE" not in conn.capabilities:
+                    conn.logout()
+                    return
+                self._watch(conn)
+            except (imaplib.IMAP4.error, OSError):
+                with self.lock:
+                    synced, self.ready = self.ready, False
+                if conn is not None:
+                    with suppress(OSError):
+                        conn.shutdown()
+                # Back off while the server stays unreachable; a connection
+                # that got as far as a sync starts over from the short delay
+                if synced:
+                    delay = IMAP_KEEPALIVE
+                time.sleep(delay)
+                delay = min(delay * 2, IDLE_RETRY_MAX)
+
+    def _sync(self, conn: _PooledIMAP) -> int:
+        status, data = conn.select("INBOX", readonly=True)
+        if status != "OK":
+            raise imaplib.IMAP4.error("Cannot select INBOX")
+        exists = int(data[-1] or 0)
+        summaries = _fetch_summaries(conn, max(1, exists - INBOX_CACHE_SIZE + 1), exists) if exists else []
+        if summaries is None:
+            raise imaplib.IMAP4.error("Fetch failed")
+        _drain_responses(conn)
+        with self.lock:
+            self.summaries = summaries
+            self.exists = exists
+            self.ready = True
+            self.checked = time.monotonic()
+        return exists
+
+    def _watch(self, conn: _PooledIMAP) -> None:
+        exists = self._sync(conn)
+        while True:
+            with conn.idle(duration=IDLE_DURATION) as idler:
+                responses = list(idler.burst())
+            # Responses that arrived while DONE was being acknowledged
+            responses += _drain_responses(conn)
+            with self.lock:
+                self.checked = time.monotonic()
+
+            if any(typ in ("EXPUNGE", "FETCH") for typ, _ in responses):
+                exists = self._sync(conn)
+                continue
+            latest = max((int(n) for typ, data in responses if typ == "EXISTS" for n in data if n), default=exists)
+            if latest <= exists:
+                continue
+
+            summaries = _fetch_summaries(conn, exists + 1, latest)
+            if summaries is None:
+                raise imaplib.IMAP4.error("Fetch failed")
+            _drain_responses(conn)
+            with self.lock:
+                self.summaries = (summaries + self.summaries)[:INBOX_CACHE_SIZE]
+                self.exists = latest
+            exists = latest
+
+
+def _drain_responses(conn: imaplib.IMAP4) -> list[tuple[str, list]]:
+    """Pop pending EXISTS/EXPUNGE/FETCH untagged responses."""
+    responses = []
+    for typ in ("EXISTS", "EXPUNGE", "FETCH"):
+        _, data = conn.response(typ)
+        if data != [None]:
+            responses.append((typ, data))
+    return responses
+
+
+_inbox_cache = _InboxCache()
+
+
 @mcp.tool()
+@_in_thread
+@_retry_on_reconnect
 def email_folders() -> str:
     """List all email folders/mailboxes."""
-    conn = _imap_connect()
-    try:
-        status, folders = conn.list()
-        if status != "OK":
+    with _imap_connection() as conn:
+        mailboxes = _list_mailboxes(conn)
+        if mailboxes is None:
             return "Failed to list folders"
-        result = []
-        for f in folders:
-            decoded = f.decode()
-            # Extract folder name from IMAP LIST response
-            # Format: (\\flags) "delimiter" "name"
-            parts = decoded.split(' "')
-            if len(parts) >= 2:
-                name = parts[-1].strip('"')
-            else:
-                name = decoded
-            result.append(name)
-        return "\n".join(result)
-    finally:
-        conn.logout()
+        return "\n".join(name for _, name in mailboxes)
 
 
 @mcp.tool()
+@_in_thread
+@_retry_on_reconnect
 def email_list(folder: str = "INBOX", count: int = 20) -> list[dict]:
     """List recent emails in a folder.
 
@@ -157,44 +874,31 @@ def email_list(folder: str = "INBOX", count: int = 20) -> list[dict]:
         folder: Folder name (default: INBOX)
         count: Number of recent emails to return (default: 20)
     """
-    conn = _imap_connect()
-    try:
-        status, _ = conn.select(folder, readonly=True)
+    if folder == "INBOX":
+        _inbox_cache.start()
+        cached = _inbox_cache.get(count)
+        if cached is not None:
+            return cached
+
+    with _imap_connection() as conn:
+        # A real SELECT (not the cached one) so EXISTS is current
+        status, data = conn.select(folder, readonly=True)
         if status != "OK":
             return [{"error": f"Cannot select folder: {folder}"}]
 
-        status, data = conn.uid("search", None, "ALL")
-        if status != "OK":
-            return [{"error": "Search failed"}]
-
-        uids = data[0].split()
-        if not uids:
+        exists = int(data[-1] or 0)
+        if exists == 0 or count < 1:
             return []
 
-        recent_uids = uids[-count:]
-        recent_uids.reverse()
-
-        results = []
-        for uid in recent_uids:
-            status, msg_data = conn.uid("fetch", uid, "(BODY.PEEK[HEADER] FLAGS)")
-            if status != "OK" or not msg_data or not msg_data[0]:
-                continue
-            raw = msg_data[0][1] if isinstance(msg_data[0], tuple) else msg_data[0]
-            msg = email.message_from_bytes(raw)
-            summary = _format_email_summary(uid, msg)
-
-            # Parse flags
-            flags_data = msg_data[0][0] if isinstance(msg_data[0], tuple) else b""
-            flags_str = flags_data.decode(errors="replace")
-            summary["seen"] = "\\Seen" in flags_str
-
-            results.append(summary)
+        results = _fetch_summaries(conn, max(1, exists - count + 1), exists)
+        if results is None:
+            return [{"error": "Fetch failed"}]
         return results
-    finally:
-        conn.logout()
 
 
 @mcp.tool()
+@_in_thread
+@_retry_on_reconnect
 def email_read(uid: str, folder: str = "INBOX") -> dict:
     """Read a specific email by UID.
 
@@ -202,35 +906,89 @@ def email_read(uid: str, folder: str = "INBOX") -> dict:
         uid: Email UID
         folder: Folder name (default: INBOX)
     """
-    conn = _imap_connect()
-    try:
-        status, _ = conn.select(folder)
+    with _imap_connection() as conn:
+        status = conn.select_cached(folder, readonly=True)
         if status != "OK":
             return {"error": f"Cannot select folder: {folder}"}
 
-        status, msg_data = conn.uid("fetch", uid.encode(), "(RFC822)")
+        # Structure and headers first; then only the body text part, so
+        # attachment payloads never cross the wire
+        status, msg_data = conn.uid("fetch", uid.encode(), "(BODYSTRUCTURE BODY.PEEK[HEADER])")
         if status != "OK" or not msg_data or not msg_data[0]:
             return {"error": f"Email UID {uid} not found"}
 
-        raw = msg_data[0][1]
-        msg = email.message_from_bytes(raw)
+        fields = _fetch_fields(msg_data, uid.encode())
+        header = fields.get(b"BODY[HEADER]")
+        if header is None:
+            return {"error": f"Email UID {uid} not found"}
+        msg = _HEADER_PARSER.parsebytes(header)
+        bodystructure = fields.get(b"BODYSTRUCTURE") or []
+
+        body_part = _get_body_part(bodystructure)
+        body = _decode_text(_fetch_section(conn, uid, body_part), body_part) if body_part else ""
 
         return {
             "uid": uid,
-            "from": _decode_header_value(msg.get("From", "")),
-            "to": _decode_header_value(msg.get("To", "")),
-            "cc": _decode_header_value(msg.get("Cc", "")),
-            "subject": _decode_header_value(msg.get("Subject", "")),
-            "date": msg.get("Date", ""),
-            "message_id": msg.get("Message-ID", ""),
-            "body": _get_body(msg),
-            "attachments": _get_attachments(msg),
+            "from": str(msg.get("From", "")),
+            "to": str(msg.get("To", "")),
+            "cc": str(msg.get("Cc", "")),
+            "subject": str(msg.get("Subject", "")),
+            "date": str(msg.get("Date", "")),
+            "message_id": str(msg.get("Message-ID", "")),
+            "body": body,
+            "attachments": _get_attachments(bodystructure),
         }
-    finally:
-        conn.logout()
 
 
 @mcp.tool()
+@_in_thread
+@_retry_on_reconnect
+def email_read_attachment(uid: str, part: str, folder: str = "INBOX") -> dict:
+    """Download a single attachment of an email.
+
+    Args:
+        uid: Email UID
+        part: Attachment part number, as listed in email_read's attachments
+        folder: Folder name (default: INBOX)
+    """
+    if not _SECTION_RE.fullmatch(part):
+        return {"error": f"Invalid part number: {part}"}
+
+    with _imap_connection() as conn:
+        status = conn.select_cached(folder, readonly=True)
+        if status != "OK":
+            return {"error": f"Cannot select folder: {folder}"}
+
+        status, msg_data = conn.uid("fetch", uid.encode(), "(BODYSTRUCTURE)")
+        if status != "OK" or not msg_data or not msg_data[0]:
+            return {"error": f"Email UID {uid} not found"}
+
+        fields = _fetch_fields(msg_data, uid.encode())
+        if not fields:
+            return {"error": f"Email UID {uid} not found"}
+        bodystructure = fields.get(b"BODYSTRUCTURE") or []
+        leaf = next((p for p in _walk_bodystructure(bodystructure) if p["section"] == part), None)
+        if leaf is None:
+            return {"error": f"Part {part} not found in email UID {uid}"}
+        data = _fetch_section(conn, uid, leaf)
+
+    result = {
+        "uid": uid,
+        "part": part,
+        "filename": _part_filename(leaf),
+        "content_type": leaf["content_type"],
+        "size": len(data),
+    }
+    if leaf["content_type"].startswith(("text/", "message/")):
+        result["content"] = _decode_text(data, leaf)
+    else:
+        result["content_base64"] = base64.b64encode(data).decode()
+    return result
+
+
+@mcp.tool()
+@_in_thread
+@_retry_on_reconnect
 def email_search(query: str, folder: str = "INBOX", count: int = 20) -> list[dict]:
     """Search emails using IMAP search criteria.
 
@@ -245,9 +1003,8 @@ def email_search(query: str, folder: str = "INBOX", count: int = 20) -> list[dic
         folder: Folder name (default: INBOX)
         count: Max results to return (default: 20)
     """
-    conn = _imap_connect()
-    try:
-        status, _ = conn.select(folder, readonly=True)
+    with _imap_connection() as conn:
+        status = conn.select_cached(folder, readonly=True)
         if status != "OK":
             return [{"error": f"Cannot select folder: {folder}"}]
 
@@ -262,20 +1019,28 @@ def email_search(query: str, folder: str = "INBOX", count: int = 20) -> list[dic
         recent_uids = uids[-count:]
         recent_uids.reverse()
 
+        status, msg_data = conn.uid("fetch", b",".join(recent_uids), "(BODY.PEEK[HEADER] FLAGS)")
+        if status != "OK":
+            return [{"error": "Fetch failed"}]
+
+        headers = {}
+        for meta, raw in _fetch_items(msg_data):
+            match = _FETCH_UID_RE.search(meta)
+            if match:
+                headers[match.group(1)] = raw
+
         results = []
         for uid in recent_uids:
-            status, msg_data = conn.uid("fetch", uid, "(BODY.PEEK[HEADER] FLAGS)")
-            if status != "OK" or not msg_data or not msg_data[0]:
+            raw = headers.get(uid)
+            if raw is None:
                 continue
-            raw = msg_data[0][1] if isinstance(msg_data[0], tuple) else msg_data[0]
-            msg = email.message_from_bytes(raw)
+            msg = _HEADER_PARSER.parsebytes(raw)
             results.append(_format_email_summary(uid, msg))
         return results
-    finally:
-        conn.logout()
 
 
 @mcp.tool()
+@_in_thread
 def email_send(
     to: str,
     subject: str,
@@ -294,13 +1059,7 @@ def email_send(
         cc: CC recipients, comma-separated (optional)
         bcc: BCC recipients, comma-separated (optional)
     """
-    if html:
-        msg = MIMEMultipart("alternative")
-        msg.attach(MIMEText(body, "plain", "utf-8"))
-        msg.attach(MIMEText(html, "html", "utf-8"))
-    else:
-        msg = MIMEText(body, "plain", "utf-8")
-    msg["From"] = EMAIL_USER
+    msg = _new_message(body, html)
     msg["To"] = to
     msg["Subject"] = subject
     if cc:
@@ -312,18 +1071,14 @@ def email_send(
     if bcc:
         recipients += [addr.strip() for addr in bcc.split(",")]
 
-    msg_str = msg.as_string()
-    with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as smtp:
-        smtp.starttls()
-        smtp.login(EMAIL_USER, EMAIL_PASSWORD)
-        smtp.sendmail(EMAIL_USER, recipients, msg_str)
-
-    _save_to_sent(msg_str.encode())
+    # Serialize once, straight to CRLF bytes, for both SMTP and the Sent copy
+    _send_message(recipients, msg.as_bytes(policy=email.policy.SMTP))
 
     return f"Email sent to {to}"
 
 
 @mcp.tool()
+@_in_thread
 def email_reply(
     uid: str,
     body: str,
@@ -340,36 +1095,32 @@ def email_reply(
         reply_all: If True, reply to all recipients (default: False)
         folder: Folder containing the email (default: INBOX)
     """
-    conn = _imap_connect()
-    try:
-        status, _ = conn.select(folder, readonly=True)
+    with _imap_connection() as conn:
+        status = conn.select_cached(folder, readonly=True)
         if status != "OK":
             return f"Cannot select folder: {folder}"
 
-        status, msg_data = conn.uid("fetch", uid.encode(), "(RFC822)")
+        # Only the headers are needed to address the reply
+        status, msg_data = conn.uid("fetch", uid.encode(), "(BODY.PEEK[HEADER])")
         if status != "OK" or not msg_data or not msg_data[0]:
             return f"Email UID {uid} not found"
 
-        raw = msg_data[0][1]
-        original = email.message_from_bytes(raw)
-    finally:
-        conn.logout()
+        header = _fetch_fields(msg_data, uid.encode()).get(b"BODY[HEADER]")
+        if header is None:
+            return f"Email UID {uid} not found"
+        original = _HEADER_PARSER.parsebytes(header)
 
-    original_from = original.get("From", "")
-    original_subject = original.get("Subject", "")
-    original_message_id = original.get("Message-ID", "")
+    # str() drops the parsed header objects, which would otherwise fold
+    # under their own name when copied into the reply
+    original_from = str(original.get("From", ""))
+    original_subject = str(original.get("Subject", ""))
+    original_message_id = str(original.get("Message-ID", ""))
 
     subject = original_subject
     if not subject.lower().startswith("re:"):
         subject = f"Re: {subject}"
 
-    if html:
-        reply = MIMEMultipart("alternative")
-        reply.attach(MIMEText(body, "plain", "utf-8"))
-        reply.attach(MIMEText(html, "html", "utf-8"))
-    else:
-        reply = MIMEText(body, "plain", "utf-8")
-    reply["From"] = EMAIL_USER
+    reply = _new_message(body, html)
     reply["Subject"] = subject
     reply["In-Reply-To"] = original_message_id
     reply["References"] = original_message_id
@@ -377,13 +1128,13 @@ def email_reply(
     recipients = [email.utils.parseaddr(original_from)[1]]
 
     if reply_all:
-        original_to = original.get("To", "")
-        original_cc = original.get("Cc", "")
+        original_to = str(original.get("To", ""))
+        original_cc = str(original.get("Cc", ""))
         all_addrs = []
         for field in [original_to, original_cc]:
             if field:
                 for _, addr in email.utils.getaddresses([field]):
-                    if addr and addr.lower() != EMAIL_USER.lower():
+                    if addr and addr.lower() != _cfg().email_user.lower():
                         all_addrs.append(addr)
         if all_addrs:
             reply["Cc"] = ", ".join(all_addrs)
@@ -391,18 +1142,13 @@ def email_reply(
 
     reply["To"] = email.utils.parseaddr(original_from)[1]
 
-    reply_str = reply.as_string()
-    with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as smtp:
-        smtp.starttls()
-        smtp.login(EMAIL_USER, EMAIL_PASSWORD)
-        smtp.sendmail(EMAIL_USER, recipients, reply_str)
-
-    _save_to_sent(reply_str.encode())
+    _send_message(recipients, reply.as_bytes(policy=email.policy.SMTP))
 
     return f"Reply sent to {reply['To']}"
 
 
 @mcp.tool()
+@_in_thread
 def email_delete(uid: str, folder: str = "INBOX") -> str:
     """Delete an email by UID (moves to Trash).
 
@@ -410,31 +1156,41 @@ def email_delete(uid: str, folder: str = "INBOX") -> str:
         uid: UID of the email to delete
         folder: Folder containing the email (default: INBOX)
     """
-    conn = _imap_connect()
-    try:
-        status, _ = conn.select(folder)
+    global _trash_folder
+    with _imap_connection() as conn:
+        status = conn.select_cached(folder)
         if status != "OK":
             return f"Cannot select folder: {folder}"
 
-        # Try to move to Trash folder (common names)
-        trash_names = ["Trash", "INBOX.Trash", "Deleted Items", "Deleted"]
+        # Resolve Trash once: the SPECIAL-USE \Trash mailbox if the server
+        # marks one, otherwise whichever common name first accepts the message
+        if _trash_folder is None:
+            mailboxes = _list_mailboxes(conn) or []
+            _trash_folder = next((name for flags, name in mailboxes if b"\\trash" in flags), "")
+        trash_names = [_trash_folder] if _trash_folder else []
+        trash_names += [name for name in TRASH_NAMES if name != _trash_folder]
+
+        # MOVE (RFC 6851) does copy + flag + expunge in one round-trip
+        command = "move" if "MOVE" in conn.capabilities else "copy"
         moved = False
         for trash in trash_names:
-            status, _ = conn.uid("copy", uid.encode(), trash)
+            status, _ = conn.uid(command, uid.encode(), _encode_mailbox(trash))
             if status == "OK":
-                conn.uid("store", uid.encode(), "+FLAGS", "(\\Deleted)")
-                conn.expunge()
+                if command == "copy":
+                    _expunge_uid(conn, uid.encode())
+                _trash_folder = trash
                 moved = True
                 break
 
         if not moved:
             # Fallback: just mark as deleted
-            conn.uid("store", uid.encode(), "+FLAGS", "(\\Deleted)")
-            conn.expunge()
+            _expunge_uid(conn, uid.encode())
+
+        if folder == "INBOX":
+            # Don't serve the message again before the IDLE watcher sees the EXPUNGE
+            _inbox_cache.discard(uid)
 
         return f"Email UID {uid} deleted"
-    finally:
-        conn.logout()
 
 
 if __name__ == "__main__":